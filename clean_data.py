@@ -9,8 +9,13 @@ Author: NYC Taxi Project
 Date: 2025
 """
 
-import pandas as pd
-from sqlalchemy import create_engine
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as fs
+
+from utils.sqlite_writer import write_trips
+from utils.trip_cleaning import SCAN_BATCH_SIZE, TRIP_COLUMNS, VALID_TRIP_FILTER, to_trips_frame
+from utils.trip_sampling import reservoir_sample
 
 def run_etl(parquet_path: str, db_path: str, sample_size: int = 10000):
     """
@@ -21,7 +26,7 @@ def run_etl(parquet_path: str, db_path: str, sample_size: int = 10000):
     - Converting datetime columns to proper format
     - Calculating trip duration in minutes
     - Optional sampling for performance
-    - Saving to SQLite database with proper chunking
+    - Bulk loading into SQLite database in a single transaction
     
     Args:
         parquet_path (str): Path to the input parquet file
@@ -34,54 +39,49 @@ def run_etl(parquet_path: str, db_path: str, sample_size: int = 10000):
     """
     print(f"Loading data from {parquet_path}...")
     
-    # Extract: Load data from parquet file
-    df = pd.read_parquet(parquet_path)
-    print(f"Initial shape: {df.shape}")
-
-    # Transform: Basic data cleaning operations
+    # Extract + Transform: Stream only the needed columns, dropping records
+    # with zero or negative passenger count, trip distance or duration
+    # (invalid trips) inside the parquet scan itself. The source is
+    # memory-mapped so Arrow decodes straight from the page cache.
+    dataset = ds.dataset(
+        parquet_path, format='parquet', filesystem=fs.LocalFileSystem(use_mmap=True)
+    )
+    print(f"Initial rows: {dataset.count_rows():,}")
     print("Applying data quality filters...")
-    
-    # Remove records with zero or negative passenger count (invalid trips)
-    df = df[df['passenger_count'] > 0]
-    
-    # Remove records with zero or negative trip distance (invalid trips)
-    df = df[df['trip_distance'] > 0]
-
-    # Ensure datetime columns are properly formatted for time-based analysis
-    print("Converting datetime columns...")
-    df['tpep_pickup_datetime'] = pd.to_datetime(df['tpep_pickup_datetime'])
-    df['tpep_dropoff_datetime'] = pd.to_datetime(df['tpep_dropoff_datetime'])
-
-    # Calculate trip duration in minutes for analysis
-    print("Calculating trip duration...")
-    df['duration_minutes'] = (
-        df['tpep_dropoff_datetime'] - df['tpep_pickup_datetime']
-    ).dt.total_seconds() / 60
-
-    # Remove trips with negative or zero duration (data quality issue)
-    df = df[df['duration_minutes'] > 0]
-    print(f"After cleaning: {df.shape}")
+    scanner = dataset.scanner(
+        columns=TRIP_COLUMNS,
+        filter=VALID_TRIP_FILTER,
+        batch_size=SCAN_BATCH_SIZE,
+        use_threads=True,  # decode row groups in parallel on Arrow's thread pool
+        fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=True),
+    )
 
-    # Optional sampling for performance optimization on large datasets
-    if sample_size and len(df) > sample_size:
-        df = df.sample(n=sample_size, random_state=42)  # Fixed seed for reproducibility
-        print(f"Sampled to {sample_size} rows for performance")
+    print("Converting datetime columns and calculating trip duration...")
+    if sample_size:
+        # Optional sampling for performance optimization on large datasets:
+        # rows are sampled while streaming, so only sample_size rows are held
+        tbl, cleaned_rows = reservoir_sample(scanner.to_reader(), sample_size)
+        print(f"After cleaning: {cleaned_rows:,} rows")
+        if cleaned_rows > sample_size:
+            print(f"Sampled to {sample_size} rows for performance")
+        frames = [to_trips_frame(tbl)]
+        del tbl
+    else:
+        # Full dataset: clean and load one scan batch at a time, so peak
+        # memory stays at a single batch instead of the whole month
+        frames = (
+            to_trips_frame(pa.Table.from_batches([batch]))
+            for batch in scanner.to_batches()
+        )
 
     # Load: Save cleaned data to SQLite database
     print(f"Saving to SQLite DB at {db_path}...")
-    engine = create_engine(f"sqlite:///{db_path}")
-
     try:
-        # Use chunked writing to avoid memory issues with large datasets
-        df.to_sql(
-            'trips',                    # Table name
-            engine,                     # Database connection
-            if_exists='replace',        # Replace existing table
-            index=False,                # Don't save DataFrame index
-            method='multi',             # Use multi-row INSERT for speed
-            chunksize=500              # Process in chunks to avoid SQLite limits
-        )
-        print(f"✅ Successfully saved {len(df)} rows to 'trips' table.")
+        # ADBC bulk ingest (sqlite3 executemany fallback) in a single transaction
+        rows = write_trips(frames, db_path)
+        if not sample_size:
+            print(f"After cleaning: {rows:,} rows")
+        print(f"✅ Successfully saved {rows} rows to 'trips' table.")
     except Exception as e:
         print(f"❌ Error saving to database: {e}")
         raise
@@ -22,10 +22,24 @@ import seaborn as sns
 from sqlalchemy import create_engine
 import os
 
+from utils.plotting import histogram_with_kde
+
 # Configure plot style for consistent, professional visualizations
 sns.set(style="whitegrid")
 plt.rcParams['figure.figsize'] = (10, 6)  # Default figure size
 
+# Resolution of the saved PNG plots
+PLOT_DPI = 150
+
+# Row-level columns loaded for analysis; temporal and categorical counts are
+# aggregated in SQL
+EDA_COLUMNS = [
+    'trip_distance',
+    'duration_minutes',
+    'fare_amount',
+    'passenger_count',
+]
+
 def run_eda(db_path: str):
     """
     Perform comprehensive exploratory data analysis on NYC taxi data.
@@ -46,7 +60,9 @@ def run_eda(db_path: str):
     # Data Loading and Initial Assessment
     print("🔌 Connecting to database...")
     engine = create_engine(f"sqlite:///{db_path}")
-    df = pd.read_sql("SELECT * FROM trips", engine)
+    df = pd.read_sql(
+        f"SELECT {', '.join(EDA_COLUMNS)} FROM trips", engine, dtype_backend='pyarrow'
+    )
     print(f"📊 Loaded {len(df):,} rows for analysis\n")
 
     # === DATA QUALITY ASSESSMENT ===
@@ -69,59 +85,65 @@ def run_eda(db_path: str):
     print("\n" + "=" * 50)
     print("📈 DESCRIPTIVE STATISTICS")
     print("=" * 50)
-    print(df.describe())
+    # Computed once; the range checks and plot annotations below reuse it
+    # instead of rescanning each column for min/max/mean
+    stats = df.describe()
+    print(stats)
 
     # === DATA RANGE AND UNIT VALIDATION ===
     print("\n" + "=" * 50)
     print("🎯 DATA RANGE VALIDATION")
     print("=" * 50)
-    print(f"Trip distance: {df['trip_distance'].min():.2f} - {df['trip_distance'].max():.2f} miles")
-    print(f"Trip duration: {df['duration_minutes'].min():.2f} - {df['duration_minutes'].max():.2f} minutes")
-    print(f"Fare amount: ${df['fare_amount'].min():.2f} - ${df['fare_amount'].max():.2f}")
-    print(f"Passenger count: {df['passenger_count'].min()} - {df['passenger_count'].max()} passengers")
+    print(f"Trip distance: {stats.at['min', 'trip_distance']:.2f} - {stats.at['max', 'trip_distance']:.2f} miles")
+    print(f"Trip duration: {stats.at['min', 'duration_minutes']:.2f} - {stats.at['max', 'duration_minutes']:.2f} minutes")
+    print(f"Fare amount: ${stats.at['min', 'fare_amount']:.2f} - ${stats.at['max', 'fare_amount']:.2f}")
+    print(f"Passenger count: {stats.at['min', 'passenger_count']} - {stats.at['max', 'passenger_count']} passengers")
 
     # === DISTRIBUTION ANALYSIS ===
     print("\n" + "=" * 50)
     print("📊 GENERATING DISTRIBUTION PLOTS")
     print("=" * 50)
     
+    # One figure and axes are reused for every plot: each section clears the
+    # axes and resizes the canvas instead of allocating a new figure
+    fig, ax = plt.subplots(figsize=(12, 6))
+
     # Trip Distance Distribution
     print("📏 Analyzing trip distance distribution...")
-    plt.figure(figsize=(12, 6))
-    sns.histplot(df['trip_distance'], bins=50, kde=True, alpha=0.7)
-    plt.title("Trip Distance Distribution", fontsize=16, fontweight='bold')
-    plt.xlabel("Distance (Miles)", fontsize=12)
-    plt.ylabel("Frequency", fontsize=12)
-    plt.axvline(df['trip_distance'].mean(), color='red', linestyle='--', 
-                label=f'Mean: {df["trip_distance"].mean():.2f} miles')
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig("plot_trip_distance.png", dpi=300, bbox_inches='tight')
-    plt.clf()
+    # Bars from NumPy bin counts; KDE fitted on a bounded sample
+    histogram_with_kde(ax, df['trip_distance'], bins=50)
+    ax.set_title("Trip Distance Distribution", fontsize=16, fontweight='bold')
+    ax.set_xlabel("Distance (Miles)", fontsize=12)
+    ax.set_ylabel("Frequency", fontsize=12)
+    ax.axvline(stats.at['mean', 'trip_distance'], color='red', linestyle='--', 
+               label=f"Mean: {stats.at['mean', 'trip_distance']:.2f} miles")
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig("plot_trip_distance.png", dpi=PLOT_DPI, bbox_inches='tight')
+    ax.clear()
 
     # Trip Duration Distribution
     print("⏱️ Analyzing trip duration distribution...")
-    plt.figure(figsize=(12, 6))
-    sns.boxplot(x=df['duration_minutes'])
-    plt.title("Trip Duration Distribution (Box Plot)", fontsize=16, fontweight='bold')
-    plt.xlabel("Duration (Minutes)", fontsize=12)
-    plt.tight_layout()
-    plt.savefig("plot_duration_boxplot.png", dpi=300, bbox_inches='tight')
-    plt.clf()
+    sns.boxplot(x=df['duration_minutes'], ax=ax)
+    ax.set_title("Trip Duration Distribution (Box Plot)", fontsize=16, fontweight='bold')
+    ax.set_xlabel("Duration (Minutes)", fontsize=12)
+    fig.tight_layout()
+    fig.savefig("plot_duration_boxplot.png", dpi=PLOT_DPI, bbox_inches='tight')
+    ax.clear()
 
     # Fare Amount Distribution
     print("💰 Analyzing fare amount distribution...")
-    plt.figure(figsize=(12, 6))
-    sns.histplot(df['fare_amount'], bins=50, kde=True, alpha=0.7)
-    plt.title("Fare Amount Distribution", fontsize=16, fontweight='bold')
-    plt.xlabel("Fare Amount (USD)", fontsize=12)
-    plt.ylabel("Frequency", fontsize=12)
-    plt.axvline(df['fare_amount'].mean(), color='red', linestyle='--',
-                label=f'Mean: ${df["fare_amount"].mean():.2f}')
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig("plot_fare_amount.png", dpi=300, bbox_inches='tight')
-    plt.clf()
+    # Bars from NumPy bin counts; KDE fitted on a bounded sample
+    histogram_with_kde(ax, df['fare_amount'], bins=50)
+    ax.set_title("Fare Amount Distribution", fontsize=16, fontweight='bold')
+    ax.set_xlabel("Fare Amount (USD)", fontsize=12)
+    ax.set_ylabel("Frequency", fontsize=12)
+    ax.axvline(stats.at['mean', 'fare_amount'], color='red', linestyle='--',
+               label=f"Mean: ${stats.at['mean', 'fare_amount']:.2f}")
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig("plot_fare_amount.png", dpi=PLOT_DPI, bbox_inches='tight')
+    ax.clear()
 
     # === RELATIONSHIP ANALYSIS ===
     print("\n" + "=" * 50)
@@ -129,65 +151,76 @@ def run_eda(db_path: str):
     print("=" * 50)
     
     print("📈 Examining fare vs distance relationship...")
-    plt.figure(figsize=(12, 8))
-    # Sample data for plotting if dataset is large (performance optimization)
-    plot_df = df.sample(n=min(5000, len(df)), random_state=42)
-    sns.scatterplot(data=plot_df, x='trip_distance', y='fare_amount', alpha=0.6)
-    plt.title("Fare Amount vs. Trip Distance", fontsize=16, fontweight='bold')
-    plt.xlabel("Distance (Miles)", fontsize=12)
-    plt.ylabel("Fare Amount (USD)", fontsize=12)
+    fig.set_size_inches(12, 8)
+    # Hexagonal binning draws every trip as O(gridsize²) density cells
+    # instead of one marker per point, so no sampling is needed
+    plot_df = df[['trip_distance', 'fare_amount']].dropna()
+    hexbin = ax.hexbin(plot_df['trip_distance'].to_numpy(dtype='float64'),
+                       plot_df['fare_amount'].to_numpy(dtype='float64'),
+                       gridsize=60, mincnt=1, bins='log', cmap='viridis')
+    colorbar = fig.colorbar(hexbin, ax=ax, label='Number of Trips (log scale)')
+    ax.set_title("Fare Amount vs. Trip Distance", fontsize=16, fontweight='bold')
+    ax.set_xlabel("Distance (Miles)", fontsize=12)
+    ax.set_ylabel("Fare Amount (USD)", fontsize=12)
     
     # Add correlation coefficient to plot
     correlation = df['trip_distance'].corr(df['fare_amount'])
-    plt.text(0.05, 0.95, f'Correlation: {correlation:.3f}', 
-             transform=plt.gca().transAxes, fontsize=12,
-             bbox=dict(boxstyle="round,pad=0.3", facecolor="white", alpha=0.8))
-    plt.tight_layout()
-    plt.savefig("plot_fare_vs_distance.png", dpi=300, bbox_inches='tight')
-    plt.clf()
+    ax.text(0.05, 0.95, f'Correlation: {correlation:.3f}', 
+            transform=ax.transAxes, fontsize=12,
+            bbox=dict(boxstyle="round,pad=0.3", facecolor="white", alpha=0.8))
+    fig.tight_layout()
+    fig.savefig("plot_fare_vs_distance.png", dpi=PLOT_DPI, bbox_inches='tight')
+    # The colorbar lives on its own axes, so it is removed separately
+    colorbar.remove()
+    ax.clear()
 
     # === TEMPORAL PATTERN ANALYSIS ===
     print("\n" + "=" * 50)
     print("⏰ ANALYZING TEMPORAL PATTERNS")
     print("=" * 50)
     
-    # Prepare datetime features for temporal analysis
-    print("🕐 Extracting time-based features...")
-    df['pickup_datetime'] = pd.to_datetime(df['tpep_pickup_datetime'])
-    df['hour'] = df['pickup_datetime'].dt.hour
-    df['weekday'] = df['pickup_datetime'].dt.dayofweek  # 0=Monday, 6=Sunday
+    # Aggregate time-based features in SQLite with one GROUP BY over
+    # (weekday, hour), so the table is scanned once and only counts are loaded
+    print("🕐 Aggregating trips by hour and weekday...")
+    # strftime('%w') counts from Sunday; shift so 0=Monday, 6=Sunday
+    temporal = pd.read_sql(
+        "SELECT (CAST(strftime('%w', tpep_pickup_datetime) AS INTEGER) + 6) % 7 AS weekday, "
+        "CAST(strftime('%H', tpep_pickup_datetime) AS INTEGER) AS hour, "
+        "COUNT(*) AS trips FROM trips GROUP BY weekday, hour",
+        engine
+    )
+    hourly_counts = temporal.groupby('hour')['trips'].sum().sort_index()
+    weekday_counts = temporal.groupby('weekday')['trips'].sum().sort_index()
 
     # Hourly Distribution Analysis
     print("📅 Analyzing hourly trip patterns...")
-    plt.figure(figsize=(14, 6))
-    hourly_counts = df['hour'].value_counts().sort_index()
-    sns.barplot(x=hourly_counts.index, y=hourly_counts.values, palette='viridis')
-    plt.title("Trip Distribution by Hour of Day", fontsize=16, fontweight='bold')
-    plt.xlabel("Hour of Day", fontsize=12)
-    plt.ylabel("Number of Trips", fontsize=12)
+    fig.set_size_inches(14, 6)
+    sns.barplot(x=hourly_counts.index, y=hourly_counts.values, palette='viridis', ax=ax)
+    ax.set_title("Trip Distribution by Hour of Day", fontsize=16, fontweight='bold')
+    ax.set_xlabel("Hour of Day", fontsize=12)
+    ax.set_ylabel("Number of Trips", fontsize=12)
     # Add peak hour annotation
     peak_hour = hourly_counts.idxmax()
-    plt.axvline(peak_hour, color='red', linestyle='--', alpha=0.7,
-                label=f'Peak Hour: {peak_hour}:00')
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig("plot_hourly_distribution.png", dpi=300, bbox_inches='tight')
-    plt.clf()
+    ax.axvline(peak_hour, color='red', linestyle='--', alpha=0.7,
+               label=f'Peak Hour: {peak_hour}:00')
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig("plot_hourly_distribution.png", dpi=PLOT_DPI, bbox_inches='tight')
+    ax.clear()
 
     # Weekly Distribution Analysis
     print("📆 Analyzing weekly trip patterns...")
-    plt.figure(figsize=(12, 6))
-    weekday_counts = df['weekday'].value_counts().sort_index()
+    fig.set_size_inches(12, 6)
     weekday_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
     sns.barplot(x=[weekday_names[i] for i in weekday_counts.index], 
-                y=weekday_counts.values, palette='Set2')
-    plt.title("Trip Distribution by Day of Week", fontsize=16, fontweight='bold')
-    plt.xlabel("Day of Week", fontsize=12)
-    plt.ylabel("Number of Trips", fontsize=12)
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig("plot_weekday_distribution.png", dpi=300, bbox_inches='tight')
-    plt.clf()
+                y=weekday_counts.values, palette='Set2', ax=ax)
+    ax.set_title("Trip Distribution by Day of Week", fontsize=16, fontweight='bold')
+    ax.set_xlabel("Day of Week", fontsize=12)
+    ax.set_ylabel("Number of Trips", fontsize=12)
+    ax.tick_params(axis='x', rotation=45)
+    fig.tight_layout()
+    fig.savefig("plot_weekday_distribution.png", dpi=PLOT_DPI, bbox_inches='tight')
+    plt.close(fig)
 
     # === CATEGORICAL DATA ANALYSIS ===
     print("\n" + "=" * 50)
@@ -195,13 +228,21 @@ def run_eda(db_path: str):
     print("=" * 50)
     
     print("💳 Payment type distribution:")
-    payment_dist = df['payment_type'].value_counts()
+    payment_dist = pd.read_sql(
+        "SELECT payment_type, COUNT(*) AS count FROM trips "
+        "WHERE payment_type IS NOT NULL GROUP BY payment_type ORDER BY count DESC",
+        engine, index_col='payment_type'
+    )['count']
     print(payment_dist)
     print(f"Payment type percentages:")
     print((payment_dist / len(df) * 100).round(2))
 
     print("\n🗺️ Top 10 pickup locations by frequency:")
-    location_dist = df['PULocationID'].value_counts().head(10)
+    location_dist = pd.read_sql(
+        "SELECT PULocationID, COUNT(*) AS count FROM trips "
+        "WHERE PULocationID IS NOT NULL GROUP BY PULocationID ORDER BY count DESC LIMIT 10",
+        engine, index_col='PULocationID'
+    )['count']
     print(location_dist)
 
     print("\n" + "=" * 50)
@@ -7,7 +7,8 @@ generation with HTML and PDF outputs.
 
 Pipeline Stages:
 1. ETL Task: Extract, transform, and load taxi data from parquet to SQLite
-2. EDA Task: Generate exploratory data analysis visualizations
+   (plus a cleaned Parquet copy for EDA)
+2. EDA Task: Generate exploratory data analysis visualizations from Parquet
 3. Report Task: Create HTML report with embedded analytics
 4. PDF Conversion Task: Convert HTML report to PDF with fallback options
 
@@ -24,182 +25,264 @@ Date: 2025
 
 from prefect import flow, task, get_run_logger
 import pandas as pd
-from sqlalchemy import create_engine
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as fs
+import pyarrow.parquet as pq
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 import pdfkit
 import sys
+from typing import Iterable, Iterator, Tuple
 
 # 🔧 Add project root to module path for imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from utils.eda_report_generator import generate_eda_report
+from utils.plotting import histogram_with_kde
+from utils.sqlite_writer import write_trips
+from utils.trip_cleaning import SCAN_BATCH_SIZE, TRIP_COLUMNS, VALID_TRIP_FILTER, to_trips_frame
+from utils.trip_sampling import reservoir_sample
 
 # Configure plot style for consistent visualizations
 sns.set_theme(style="whitegrid")
 
+# Cleaned columns used by the EDA plots; pickup hour/weekday are derived
+# during the scan
+EDA_COLUMNS = ['trip_distance', 'duration_minutes', 'fare_amount']
+
+
+def _tee_to_parquet(frames: Iterable[pd.DataFrame], path: str) -> Iterator[pd.DataFrame]:
+    """
+    Pass DataFrames through unchanged while appending each one to a Parquet file.
+
+    Args:
+        frames (Iterable[pd.DataFrame]): Cleaned trip batches
+        path (str): Output Parquet file, replaced if it exists
+
+    Yields:
+        pd.DataFrame: The input frames, in order
+    """
+    writer = None
+    try:
+        for df in frames:
+            tbl = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, tbl.schema, compression='snappy')
+            else:
+                # Category index widths can differ between batches
+                tbl = tbl.cast(writer.schema)
+            writer.write_table(tbl)
+            yield df
+    finally:
+        if writer is not None:
+            writer.close()
+
 @task
-def etl_task(parquet_path: str, db_path: str, sample_size: int = 10000) -> str:
+def etl_task(
+    parquet_path: str,
+    db_path: str,
+    sample_size: int = 10000,
+    trips_path: str = "db/trips.parquet",
+) -> Tuple[str, str]:
     """
     Extract, Transform, and Load NYC taxi data from parquet to SQLite.
     
     This task performs comprehensive data cleaning and transformation:
-    - Loads raw parquet data
+    - Loads the required columns of the raw parquet data
     - Filters invalid records (zero passengers/distance)
     - Converts datetime columns to proper format
     - Calculates trip duration metrics
     - Applies optional sampling for performance
     - Saves cleaned data to SQLite database
+    - Saves a columnar Parquet copy of the cleaned data for EDA
+
+    The Parquet copy is written to a temporary file and only moved to
+    trips_path once the SQLite load has committed, so a failed load leaves
+    the previous database and Parquet file in a consistent state.
     
     Args:
         parquet_path (str): Path to input parquet file
         db_path (str): Path for output SQLite database
         sample_size (int): Number of rows to sample (None for full dataset)
+        trips_path (str): Path for the cleaned Parquet file read by eda_task
     
     Returns:
-        str: Path to created database file
+        Tuple[str, str]: Paths to the created database and Parquet files
     """
     logger = get_run_logger()
     logger.info(f"🚀 Starting ETL process - Loading data from {parquet_path}")
     
-    # Extract: Load raw data from parquet file
-    df = pd.read_parquet(parquet_path)
-    logger.info(f"📊 Initial dataset shape: {df.shape}")
-
-    # Transform: Apply data quality filters
+    # Extract + Transform: Stream only the needed columns from the
+    # memory-mapped source, pushing the data quality filters (zero
+    # passengers/distance, invalid duration) into the scan
+    dataset = ds.dataset(
+        parquet_path, format='parquet', filesystem=fs.LocalFileSystem(use_mmap=True)
+    )
+    initial_count = dataset.count_rows()
+    logger.info(f"📊 Initial dataset rows: {initial_count:,}")
     logger.info("🧹 Applying data cleaning transformations...")
-    
-    # Remove records with invalid passenger count
-    initial_count = len(df)
-    df = df[df['passenger_count'] > 0]
-    logger.info(f"   ✅ Removed {initial_count - len(df)} records with zero passengers")
-    
-    # Remove records with invalid trip distance
-    initial_count = len(df)
-    df = df[df['trip_distance'] > 0]
-    logger.info(f"   ✅ Removed {initial_count - len(df)} records with zero distance")
-
-    # Convert datetime columns for temporal analysis
-    logger.info("📅 Converting datetime columns...")
-    df['tpep_pickup_datetime'] = pd.to_datetime(df['tpep_pickup_datetime'])
-    df['tpep_dropoff_datetime'] = pd.to_datetime(df['tpep_dropoff_datetime'])
-
-    # Calculate trip duration in minutes
-    logger.info("⏱️ Calculating trip duration metrics...")
-    df['duration_minutes'] = (
-        df['tpep_dropoff_datetime'] - df['tpep_pickup_datetime']
-    ).dt.total_seconds() / 60
-
-    # Remove trips with invalid duration
-    initial_count = len(df)
-    df = df[df['duration_minutes'] > 0]
-    logger.info(f"   ✅ Removed {initial_count - len(df)} records with invalid duration")
-
-    # Apply sampling if specified (for performance optimization)
-    if sample_size and len(df) > sample_size:
-        df = df.sample(n=sample_size, random_state=42)
-        logger.info(f"🎯 Sampled dataset to {sample_size} rows for performance")
-
-    # Load: Save to SQLite database with chunked processing
+    scanner = dataset.scanner(
+        columns=TRIP_COLUMNS,
+        filter=VALID_TRIP_FILTER,
+        batch_size=SCAN_BATCH_SIZE,
+        use_threads=True,  # decode row groups in parallel on Arrow's thread pool
+        fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=True),
+    )
+
+    logger.info("📅 Converting datetime columns and ⏱️ calculating trip duration...")
+    if sample_size:
+        # Reservoir-sample while streaming so only sample_size rows are held
+        tbl, cleaned_count = reservoir_sample(scanner.to_reader(), sample_size)
+        logger.info(
+            f"   ✅ Removed {initial_count - cleaned_count} records with zero passengers, "
+            "zero distance or invalid duration"
+        )
+        if cleaned_count > sample_size:
+            logger.info(f"🎯 Sampled dataset to {sample_size} rows for performance")
+        frames = [to_trips_frame(tbl)]
+        del tbl
+    else:
+        # Full dataset: clean and load one scan batch at a time
+        frames = (
+            to_trips_frame(pa.Table.from_batches([batch]))
+            for batch in scanner.to_batches()
+        )
+
+    # Load: Bulk insert into SQLite database, keeping a columnar Parquet copy
+    # so EDA reads Parquet instead of round-tripping through SQLite
     logger.info(f"💾 Saving cleaned data to SQLite database: {db_path}")
-    engine = create_engine(f"sqlite:///{db_path}")
-    
+    logger.info(f"💾 Saving cleaned data to Parquet: {trips_path}")
+    tmp_trips_path = f"{trips_path}.tmp"
+    tee = _tee_to_parquet(frames, tmp_trips_path)
     try:
-        df.to_sql(
-            'trips',                    # Table name
-            engine,                     # Database connection
-            if_exists='replace',        # Replace existing table
-            index=False,                # Don't save DataFrame index
-            method='multi',             # Multi-row INSERT for performance
-            chunksize=500              # Chunk size to avoid SQLite limits
-        )
-        logger.info(f"✅ ETL complete: {len(df):,} rows saved to SQLite database")
+        # ADBC bulk ingest (sqlite3 executemany fallback) in a single transaction
+        rows = write_trips(tee, db_path)
+        # Publish the Parquet copy only after the SQLite load has committed
+        os.replace(tmp_trips_path, trips_path)
+        if not sample_size:
+            logger.info(
+                f"   ✅ Removed {initial_count - rows} records with zero passengers, "
+                "zero distance or invalid duration"
+            )
+        logger.info(f"✅ ETL complete: {rows:,} rows saved to SQLite database")
     except Exception as e:
+        # Close the writer and discard the partial Parquet copy
+        tee.close()
+        if os.path.exists(tmp_trips_path):
+            os.remove(tmp_trips_path)
         logger.error(f"❌ Database save failed: {e}")
         raise
     
-    return db_path
+    return db_path, trips_path
 
 
 @task
-def eda_task(db_path: str):
+def eda_task(trips_path: str):
     """
     Perform exploratory data analysis and generate visualization plots.
     
-    This task connects to the SQLite database, loads the cleaned data,
-    and generates a comprehensive set of visualizations including:
+    This task reads the columns it plots from the cleaned Parquet file
+    written by etl_task and generates a comprehensive set of visualizations including:
     - Trip distance distribution
     - Trip duration distribution  
-    - Fare vs distance scatter plot
+    - Fare vs distance density (hexbin) plot
     - Hourly trip distribution
     - Weekly trip distribution
     
     All plots are saved to the 'plots' directory for use in reporting.
     
     Args:
-        db_path (str): Path to SQLite database containing cleaned data
+        trips_path (str): Path to Parquet file containing cleaned data
     
     Returns:
         None: Saves plots as PNG files to plots/ directory
     """
     logger = get_run_logger()
-    logger.info(f"📊 Loading data from {db_path} for EDA")
+    logger.info(f"📊 Loading data from {trips_path} for EDA")
     
-    # Load data from SQLite database
-    engine = create_engine(f"sqlite:///{db_path}")
-    df = pd.read_sql("SELECT * FROM trips", engine)
+    # Single fused scan of the cleaned Parquet file: only the plotted columns
+    # are read, and hour/weekday are derived from the pickup timestamp while
+    # scanning, so the timestamp column itself is never materialized
+    pickup = ds.field('tpep_pickup_datetime')
+    tbl = ds.dataset(
+        trips_path, format='parquet', filesystem=fs.LocalFileSystem(use_mmap=True)
+    ).to_table(
+        columns={
+            **{col: ds.field(col) for col in EDA_COLUMNS},
+            'hour': pc.hour(pickup),
+            'weekday': pc.day_of_week(pickup),  # 0=Monday
+        },
+        use_threads=True,
+        fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=True),
+    )
 
-    # Prepare datetime features for temporal analysis
-    df['pickup_datetime'] = pd.to_datetime(df['tpep_pickup_datetime'])
-    df['hour'] = df['pickup_datetime'].dt.hour
-    df['weekday'] = df['pickup_datetime'].dt.day_name()  # Monday, Tuesday...
+    # Pre-aggregate temporal features with one Arrow group-by over
+    # (weekday, hour); seaborn only receives one count per hour/weekday
+    temporal = tbl.group_by(['weekday', 'hour']).aggregate([([], 'count_all')]).to_pandas()
+    hourly = temporal.groupby('hour')['count_all'].sum().reindex(range(24), fill_value=0)
+    weekly = temporal.groupby('weekday')['count_all'].sum().reindex(range(7), fill_value=0)
+    df = tbl.drop_columns(['hour', 'weekday']).to_pandas(types_mapper=pd.ArrowDtype)
 
     # Ensure plots directory exists
     os.makedirs("plots", exist_ok=True)
 
+    # One figure and axes are reused for every plot; each plot clears the
+    # axes instead of allocating a new figure
+    fig, ax = plt.subplots()
+
     # Generate Trip Distance Distribution
     logger.info("📏 Plotting trip distance histogram")
-    sns.histplot(df['trip_distance'], bins=50, kde=True)
-    plt.title("Trip Distance Distribution")
-    plt.xlabel("Miles")
-    plt.savefig("plots/trip_distance.png")
-    plt.clf()
+    # Bars from NumPy bin counts; KDE fitted on a bounded sample
+    histogram_with_kde(ax, df['trip_distance'], bins=50)
+    ax.set_title("Trip Distance Distribution")
+    ax.set_xlabel("Miles")
+    fig.savefig("plots/trip_distance.png")
+    ax.clear()
 
     # Generate Trip Duration Distribution
     logger.info("⏱️ Plotting trip duration distribution")
-    sns.histplot(df['duration_minutes'], bins=50, kde=True)
-    plt.title("Trip Duration Distribution")
-    plt.xlabel("Minutes")
-    plt.savefig("plots/duration_distribution.png")
-    plt.clf()
-
-    # Generate Fare vs Distance Scatter Plot
-    logger.info("💰 Plotting fare vs distance scatterplot")
-    sns.scatterplot(x='trip_distance', y='fare_amount', data=df, alpha=0.5)
-    plt.title("Fare vs. Trip Distance")
-    plt.xlabel("Distance (miles)")
-    plt.ylabel("Fare (USD)")
-    plt.savefig("plots/fare_vs_distance.png")
-    plt.clf()
+    histogram_with_kde(ax, df['duration_minutes'], bins=50)
+    ax.set_title("Trip Duration Distribution")
+    ax.set_xlabel("Minutes")
+    fig.savefig("plots/duration_distribution.png")
+    ax.clear()
+
+    # Generate Fare vs Distance Density Plot
+    logger.info("💰 Plotting fare vs distance hexbin density")
+    # Hexagonal density bins over all trips instead of one marker per point
+    plot_df = df[['trip_distance', 'fare_amount']].dropna()
+    hexbin = ax.hexbin(plot_df['trip_distance'].to_numpy(dtype='float64'),
+                       plot_df['fare_amount'].to_numpy(dtype='float64'),
+                       gridsize=60, mincnt=1, bins='log', cmap='viridis')
+    colorbar = fig.colorbar(hexbin, ax=ax, label='Trip Count (log scale)')
+    ax.set_title("Fare vs. Trip Distance")
+    ax.set_xlabel("Distance (miles)")
+    ax.set_ylabel("Fare (USD)")
+    fig.savefig("plots/fare_vs_distance.png")
+    # The colorbar lives on its own axes, so it is removed separately
+    colorbar.remove()
+    ax.clear()
 
     # Generate Hourly Distribution Plot
     logger.info("🕐 Plotting hourly distribution")
-    sns.countplot(x='hour', data=df)
-    plt.title("Trips by Hour of Day")
-    plt.xlabel("Hour")
-    plt.ylabel("Trip Count")
-    plt.savefig("plots/hourly_distribution.png")
-    plt.clf()
+    sns.barplot(x=hourly.index, y=hourly.values, ax=ax)
+    ax.set_title("Trips by Hour of Day")
+    ax.set_xlabel("Hour")
+    ax.set_ylabel("Trip Count")
+    fig.savefig("plots/hourly_distribution.png")
+    ax.clear()
 
     # Generate Weekly Distribution Plot
     logger.info("📅 Plotting weekday distribution")
     weekday_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    sns.countplot(x='weekday', data=df, order=weekday_order)
-    plt.title("Trips by Weekday")
-    plt.xlabel("Weekday")
-    plt.ylabel("Trip Count")
-    plt.savefig("plots/weekday_distribution.png")
-    plt.clf()
+    sns.barplot(x=weekday_order, y=weekly.values, ax=ax)
+    ax.set_title("Trips by Weekday")
+    ax.set_xlabel("Weekday")
+    ax.set_ylabel("Trip Count")
+    fig.savefig("plots/weekday_distribution.png")
+    plt.close(fig)
 
     logger.info("✅ EDA complete. Plots saved in /plots folder.")
 
@@ -332,16 +415,19 @@ def taxi_pipeline():
     # Define file paths for pipeline artifacts
     parquet_path = "data/yellow_tripdata_2023-01.parquet"
     db_path = "db/nyc_taxi.db"
+    trips_path = "db/trips.parquet"
     html_path = "reports/eda_report.html"
     pdf_path = "reports/eda_report.pdf"
     
     # Task 1: ETL - Extract, Transform, Load data
     logger.info("📊 Phase 1: ETL Processing")
-    db_result = etl_task(parquet_path, db_path, sample_size=10000)
+    db_result, trips_result = etl_task(
+        parquet_path, db_path, sample_size=10000, trips_path=trips_path
+    )
     
     # Task 2: EDA - Generate visualizations (depends on ETL completion)
     logger.info("📈 Phase 2: Exploratory Data Analysis")
-    eda_task(db_result)
+    eda_task(trips_result)
     
     # Task 3: Report Generation (depends on EDA completion)
     logger.info("📄 Phase 3: Report Generation")
@@ -35,17 +35,19 @@ def test_database_connection():
         print("🔌 Connecting to NYC Taxi database...")
         engine = create_engine('sqlite:///db/nyc_taxi.db')
         
-        # Query for sample records
+        # Query for sample records and the row count over one connection
         print("📊 Retrieving sample records...")
-        query = "SELECT * FROM trips LIMIT 5"
-        df = pd.read_sql(query, engine)
+        with engine.connect() as conn:
+            query = "SELECT * FROM trips LIMIT 5"
+            df = pd.read_sql(query, conn)
+            count = conn.exec_driver_sql("SELECT COUNT(*) FROM trips").scalar()
         
         # Display results
         print("✅ Connection successful! Sample data:")
         print("=" * 80)
         print(df.to_string(index=False))
         print("=" * 80)
-        print(f"📈 Database contains {len(pd.read_sql('SELECT COUNT(*) as count FROM trips', engine).iloc[0, 0]):,} total records")
+        print(f"📈 Database contains {count:,} total records")
         
     except Exception as e:
         print(f"❌ Database connection failed: {e}")
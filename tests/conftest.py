@@ -0,0 +1,7 @@
+"""Shared pytest configuration: make the project root importable."""
+
+import os
+import sys
+
+# 🔧 Add project root to module path for `utils` imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
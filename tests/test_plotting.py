@@ -0,0 +1,54 @@
+"""Tests for the shared histogram helper in utils.plotting."""
+
+import matplotlib
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import plotting
+from utils.plotting import histogram_with_kde
+
+
+@pytest.fixture
+def ax():
+    fig, ax = plt.subplots()
+    yield ax
+    plt.close(fig)
+
+
+def test_counts_match_numpy_histogram(ax):
+    values = np.random.default_rng(0).normal(size=1000)
+
+    counts, edges = histogram_with_kde(ax, values, bins=20)
+
+    expected_counts, expected_edges = np.histogram(values, bins=20)
+    np.testing.assert_array_equal(counts, expected_counts)
+    np.testing.assert_allclose(edges, expected_edges)
+    assert len(ax.patches) == 20
+
+
+def test_kde_curve_drawn_for_spread_data(ax):
+    if plotting.gaussian_kde is None:
+        pytest.skip('scipy is not installed')
+
+    histogram_with_kde(ax, np.random.default_rng(0).normal(size=1000))
+
+    assert len(ax.lines) == 1
+
+
+def test_constant_column_draws_bars_without_kde(ax):
+    counts, _ = histogram_with_kde(ax, np.array([5.0] * 10))
+
+    assert counts.sum() == 10
+    assert len(ax.lines) == 0
+
+
+def test_missing_values_are_ignored(ax):
+    values = pd.Series([1.0, None, 2.0, 3.0], dtype='float64[pyarrow]')
+
+    counts, _ = histogram_with_kde(ax, values, bins=3)
+
+    assert counts.sum() == 3
@@ -0,0 +1,104 @@
+"""Tests for the SQLite bulk loader in utils.sqlite_writer."""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import sqlite_writer
+from utils.sqlite_writer import write_trips
+
+BACKENDS = ['adbc', 'sqlite3']
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    """Run a test against the ADBC ingest path and the executemany fallback."""
+    if request.param == 'adbc':
+        if sqlite_writer.adbc_sqlite is None:
+            pytest.skip('adbc_driver_sqlite is not installed')
+    else:
+        monkeypatch.setattr(sqlite_writer, 'adbc_sqlite', None)
+    return request.param
+
+
+def _trips(start: int, rows: int) -> pd.DataFrame:
+    """Cleaned-trip-like batch with NaN, category and datetime columns."""
+    ids = np.arange(start, start + rows)
+    pickup = pd.Timestamp('2023-01-01 08:00:00.123456') + pd.to_timedelta(ids, unit='min')
+    fares = ids * 1.5
+    fares[::5] = np.nan
+    return pd.DataFrame({
+        'passenger_count': ids % 4 + 1,
+        'trip_distance': ids * 0.25,
+        'tpep_pickup_datetime': pickup,
+        'fare_amount': fares,
+        'payment_type': pd.Categorical(ids % 3 + 1),
+        'PULocationID': ids % 265,
+    })
+
+
+def _read(db_path) -> tuple:
+    """Declared column types and rows of the trips table."""
+    with sqlite3.connect(db_path) as conn:
+        types = [(row[1], row[2]) for row in conn.execute('PRAGMA table_info("trips")')]
+        rows = conn.execute('SELECT * FROM trips ORDER BY rowid').fetchall()
+    return types, rows
+
+
+def test_writes_all_batches(tmp_path, backend):
+    db_path = tmp_path / 'trips.db'
+
+    rows = write_trips([_trips(0, 10), _trips(10, 15)], str(db_path))
+
+    types, stored = _read(db_path)
+    assert rows == 25
+    assert len(stored) == 25
+    assert types == [
+        ('passenger_count', 'INTEGER'),
+        ('trip_distance', 'REAL'),
+        ('tpep_pickup_datetime', 'TIMESTAMP'),
+        ('fare_amount', 'REAL'),
+        ('payment_type', 'INTEGER'),
+        ('PULocationID', 'INTEGER'),
+    ]
+    # NaN fares are stored as NULL; timestamps as ISO 8601 text
+    assert stored[0][3] is None
+    assert stored[0][2] == '2023-01-01T08:00:00.123456'
+
+
+def test_backends_produce_identical_tables(tmp_path, monkeypatch):
+    if sqlite_writer.adbc_sqlite is None:
+        pytest.skip('adbc_driver_sqlite is not installed')
+    frames = [_trips(0, 100), _trips(100, 50)]
+
+    write_trips(frames, str(tmp_path / 'adbc.db'))
+    monkeypatch.setattr(sqlite_writer, 'adbc_sqlite', None)
+    write_trips(frames, str(tmp_path / 'sqlite3.db'))
+
+    assert _read(tmp_path / 'adbc.db') == _read(tmp_path / 'sqlite3.db')
+
+
+def test_failure_mid_stream_rolls_back(tmp_path, backend):
+    db_path = tmp_path / 'trips.db'
+    write_trips([_trips(0, 5)], str(db_path))
+    before = _read(db_path)
+
+    def failing_frames():
+        yield _trips(100, 20)
+        raise RuntimeError('source failed')
+
+    with pytest.raises(RuntimeError, match='source failed'):
+        write_trips(failing_frames(), str(db_path))
+
+    # The previous table, indexes included, survives the failed load
+    assert _read(db_path) == before
+    with sqlite3.connect(db_path) as conn:
+        indexes = {row[1] for row in conn.execute('PRAGMA index_list("trips")')}
+    assert indexes == set(sqlite_writer.TRIP_INDEXES)
+
+
+def test_empty_stream_raises(tmp_path, backend):
+    with pytest.raises(ValueError, match='No data'):
+        write_trips([], str(tmp_path / 'trips.db'))
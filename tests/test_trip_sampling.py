@@ -0,0 +1,66 @@
+"""Tests for the streaming reservoir sampler in utils.trip_sampling."""
+
+import pyarrow as pa
+import pytest
+
+from utils.trip_sampling import reservoir_sample
+
+
+def _reader(num_rows: int, batch_size: int) -> pa.RecordBatchReader:
+    """Stream the ids 0..num_rows-1 in batches of batch_size rows."""
+    schema = pa.schema([('id', pa.int64())])
+    batches = [
+        pa.record_batch([pa.array(range(start, min(start + batch_size, num_rows)), pa.int64())],
+                        schema=schema)
+        for start in range(0, num_rows, batch_size)
+    ]
+    return pa.RecordBatchReader.from_batches(schema, batches)
+
+
+@pytest.mark.parametrize('batch_size', [1, 7, 1000, 50_000])
+def test_sample_has_requested_size_and_distinct_rows(batch_size):
+    sample, seen = reservoir_sample(_reader(20_000, batch_size), 500)
+
+    ids = sample['id'].to_pylist()
+    assert seen == 20_000
+    assert len(ids) == 500
+    assert len(set(ids)) == 500
+    assert all(0 <= i < 20_000 for i in ids)
+
+
+def test_short_stream_returns_all_rows():
+    sample, seen = reservoir_sample(_reader(30, 7), 100)
+
+    assert seen == 30
+    assert sorted(sample['id'].to_pylist()) == list(range(30))
+
+
+def test_stream_equal_to_sample_size_returns_all_rows():
+    sample, seen = reservoir_sample(_reader(100, 32), 100)
+
+    assert seen == 100
+    assert sorted(sample['id'].to_pylist()) == list(range(100))
+
+
+def test_empty_stream():
+    sample, seen = reservoir_sample(_reader(0, 10), 100)
+
+    assert seen == 0
+    assert sample.num_rows == 0
+    assert sample.schema.names == ['id']
+
+
+def test_same_seed_gives_same_sample():
+    first, _ = reservoir_sample(_reader(5_000, 256), 50, seed=7)
+    second, _ = reservoir_sample(_reader(5_000, 256), 50, seed=7)
+
+    assert first.equals(second)
+
+
+def test_sample_covers_the_whole_stream():
+    # Later rows must be able to replace early ones
+    sample, _ = reservoir_sample(_reader(100_000, 4096), 1000)
+
+    ids = sample['id'].to_pylist()
+    assert max(ids) > 90_000
+    assert sum(i >= 50_000 for i in ids) > 350
@@ -20,15 +20,219 @@ Author: NYC Taxi Project
 Date: 2025
 """
 
+import numpy as np
 import pandas as pd
-import seaborn as sns
+import matplotlib
+# Non-interactive backend: figures are only rendered to in-memory images
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 from sqlalchemy import create_engine
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 import os
-import base64
+import io
+import html
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+# SIMD-accelerated base64 encoder when installed; stdlib fallback otherwise
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+from typing import Optional
 
-def generate_eda_report(db_path: str, output_html: str = "reports/eda_report.html"):
+from utils.plotting import histogram_with_kde
+
+# Progress messages; silent unless the caller configures logging
+logger = logging.getLogger(__name__)
+
+# Numeric trip columns loaded for the overview tables and distribution plots
+REPORT_COLUMNS = [
+    'passenger_count',
+    'trip_distance',
+    'fare_amount',
+    'payment_type',
+    'PULocationID',
+    'duration_minutes',
+]
+
+# Resolution of the embedded report images; plenty for on-screen viewing
+# and typical page-size printing
+REPORT_DPI = 120
+
+# Read-side connection settings: memory-map up to 256 MB of the database
+# file and keep a larger page cache and temporary tables in memory
+REPORT_PRAGMAS = (
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA cache_size=-65536',
+    'PRAGMA temp_store=MEMORY',
+)
+
+# Minimum number of loaded trips before plots are rendered in worker
+# processes; below it, starting the workers costs more than drawing inline
+PARALLEL_PLOT_MIN_ROWS = 1_000_000
+
+# Compiled template bytecode is cached here between runs
+JINJA_CACHE_DIR = ".jinja_cache"
+
+# Shared template environment: templates are compiled once per process and
+# their bytecode reused across runs; they are not edited while the pipeline
+# runs, so the per-lookup modification check is skipped
+_JINJA_ENV = Environment(
+    loader=FileSystemLoader("templates"),
+    auto_reload=False,
+    cache_size=-1,
+    bytecode_cache=FileSystemBytecodeCache(JINJA_CACHE_DIR),
+)
+
+# Rows fetched from the SQLite cursor per chunk
+REPORT_CHUNK_SIZE = 131_072
+
+def _embed_figure(
+    fig, stem: str, plot_dir: Optional[str] = None, dpi: int = REPORT_DPI
+) -> dict:
+    """
+    Render a figure into memory and return it as an embeddable base64 PNG.
+
+    Args:
+        fig (matplotlib.figure.Figure): Figure to render
+        stem (str): File stem (e.g. "trip_distance") used for the plot title
+        plot_dir (str, optional): Also write the image to this directory for
+                                  debugging. Defaults to None (memory only).
+        dpi (int): Render resolution. Defaults to REPORT_DPI.
+
+    Returns:
+        dict: Plot 'name' and image 'data' URL for the report template
+    """
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=dpi, bbox_inches='tight')
+    image = buf.getvalue()
+    if plot_dir:
+        with open(os.path.join(plot_dir, f"{stem}.png"), "wb") as img_file:
+            img_file.write(image)
+    # Create data URL for embedding in HTML (PDF-safe)
+    return {
+        'name': stem.replace("_", " ").title(),
+        'data': "data:image/png;base64," + base64.b64encode(image).decode('ascii')
+    }
+
+def _format_stat(value: float) -> str:
+    """Format one describe() value for the statistics table."""
+    if np.isnan(value):
+        return "NaN"
+    if value.is_integer() and abs(value) < 1e15:
+        return f"{value:,.0f}"
+    return f"{value:.4g}"
+
+
+def _stats_table_html(stats: pd.DataFrame) -> str:
+    """
+    Format a small describe() result as the report's statistics table.
+
+    Builds the markup directly instead of going through DataFrame.to_html's
+    generic per-cell formatter. Whole numbers (counts, integer minima and
+    maxima) are shown in full with thousands separators; other values keep
+    four significant digits, so small values are not rounded away.
+
+    Args:
+        stats (pd.DataFrame): Output of DataFrame.describe()
+
+    Returns:
+        str: HTML table with id "stats-table"
+    """
+    header = "".join(f"<th>{html.escape(str(col))}</th>" for col in stats.columns)
+    rows = []
+    for stat, values in zip(stats.index, stats.to_numpy(dtype=np.float64)):
+        cells = "".join(f"<td>{_format_stat(value)}</td>" for value in values)
+        rows.append(f"<tr><th>{html.escape(str(stat))}</th>{cells}</tr>")
+    return (
+        '<table border="1" class="dataframe table table-striped" id="stats-table">'
+        f'<thead><tr style="text-align: right;"><th></th>{header}</tr></thead>'
+        f'<tbody>{"".join(rows)}</tbody></table>'
+    )
+
+def _render_trip_distance(distances: np.ndarray, plot_dir: Optional[str] = None,
+                          dpi: int = REPORT_DPI) -> dict:
+    """Plot 1: trip distance histogram (bars from NumPy bin counts, sampled KDE)."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    histogram_with_kde(ax, distances, bins=50)
+    ax.set_title("Trip Distance Distribution")
+    ax.set_xlabel("Distance (Miles)")
+    ax.set_ylabel("Frequency")
+    fig.tight_layout()
+    plot = _embed_figure(fig, "trip_distance", plot_dir, dpi=dpi)
+    plt.close(fig)
+    return plot
+
+def _render_duration(durations: np.ndarray, plot_dir: Optional[str] = None,
+                     dpi: int = REPORT_DPI) -> dict:
+    """Plot 2: trip duration histogram."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    histogram_with_kde(ax, durations, bins=50)
+    ax.set_title("Trip Duration Distribution")
+    ax.set_xlabel("Duration (Minutes)")
+    ax.set_ylabel("Frequency")
+    fig.tight_layout()
+    plot = _embed_figure(fig, "duration_distribution", plot_dir, dpi=dpi)
+    plt.close(fig)
+    return plot
+
+def _render_fare_vs_distance(distances: np.ndarray, fares: np.ndarray,
+                             plot_dir: Optional[str] = None, dpi: int = REPORT_DPI) -> dict:
+    """Plot 3: fare vs distance density of all trips as a 2D histogram image."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    valid = np.isfinite(distances) & np.isfinite(fares)
+    # A fixed 100x100 grid drawn as one image, however many trips there are
+    counts, x_edges, y_edges = np.histogram2d(distances[valid], fares[valid], bins=(100, 100))
+    image = ax.imshow(np.log1p(counts.T), origin='lower', aspect='auto', cmap='viridis',
+                      extent=[x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]])
+    fig.colorbar(image, ax=ax, label="log(1 + Number of Trips)")
+    ax.set_title("Fare vs Distance")
+    ax.set_xlabel("Distance (Miles)")
+    ax.set_ylabel("Fare Amount (USD)")
+    fig.tight_layout()
+    plot = _embed_figure(fig, "fare_vs_distance", plot_dir, dpi=dpi)
+    plt.close(fig)
+    return plot
+
+def _render_hourly(hourly_counts: np.ndarray, plot_dir: Optional[str] = None,
+                   dpi: int = REPORT_DPI) -> dict:
+    """Plot 4: trips per hour of day (0-23)."""
+    fig, ax = plt.subplots(figsize=(12, 6))
+    hours = np.arange(len(hourly_counts))
+    ax.bar(hours, hourly_counts, color=plt.cm.viridis(np.linspace(0, 1, len(hours))))
+    ax.set_xticks(hours)
+    ax.set_xlim(-0.5, len(hours) - 0.5)
+    ax.set_title("Trips by Hour")
+    ax.set_xlabel("Hour of Day")
+    ax.set_ylabel("Number of Trips")
+    fig.tight_layout()
+    plot = _embed_figure(fig, "hourly_distribution", plot_dir, dpi=dpi)
+    plt.close(fig)
+    return plot
+
+def _render_weekday(weekday_counts: np.ndarray, plot_dir: Optional[str] = None,
+                    dpi: int = REPORT_DPI) -> dict:
+    """Plot 5: trips per weekday (0=Monday)."""
+    fig, ax = plt.subplots(figsize=(12, 6))
+    weekday_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    ax.bar(weekday_order, weekday_counts, color=plt.cm.Set2(np.arange(len(weekday_order))))
+    ax.set_xlim(-0.5, len(weekday_order) - 0.5)
+    ax.set_title("Trips by Weekday")
+    ax.set_xlabel("Day of Week")
+    ax.set_ylabel("Number of Trips")
+    ax.tick_params(axis='x', rotation=45)
+    fig.tight_layout()
+    plot = _embed_figure(fig, "weekday_distribution", plot_dir, dpi=dpi)
+    plt.close(fig)
+    return plot
+
+def generate_eda_report(
+    db_path: str,
+    output_html: str = "reports/eda_report.html",
+    plot_dir: Optional[str] = None,
+    dpi: int = REPORT_DPI
+):
     """
     Generate a comprehensive HTML report with embedded visualizations.
     
@@ -39,143 +243,145 @@ def generate_eda_report(db_path: str, output_html: str = "reports/eda_report.htm
     
     The report is designed to be PDF-friendly by avoiding external dependencies
     and embedding all images directly in the HTML.
+
+    For large tables (PARALLEL_PLOT_MIN_ROWS trips or more) on multi-core
+    machines, plots are rendered in parallel in spawned worker processes,
+    so scripts calling this function must guard their entry point with
+    `if __name__ == "__main__":`. Smaller tables are plotted inline.
+
+    Progress is reported through this module's logger: INFO for each step,
+    DEBUG for every embedded plot.
     
     Args:
         db_path (str): Path to SQLite database containing processed taxi data
         output_html (str): Output path for HTML report. Defaults to "reports/eda_report.html"
+        plot_dir (str, optional): Directory to also save the plot PNGs to, for
+                                  debugging. Defaults to None (plots are only
+                                  embedded in the report).
+        dpi (int): Resolution of the embedded plots. Defaults to REPORT_DPI
+                   (120); raise it for print-quality output.
     
     Returns:
         None: Generates HTML file at specified output path
     """
-    print("🔌 Connecting to database for report generation...")
+    logger.info("🔌 Connecting to database for report generation...")
     
-    # Load data from SQLite database
+    # All queries share one connection, with SQLite memory-mapping the file
     engine = create_engine(f"sqlite:///{db_path}")
-    df = pd.read_sql("SELECT * FROM trips", engine)
-    print(f"📊 Loaded {len(df):,} records for analysis")
+    with engine.connect() as conn:
+        for pragma in REPORT_PRAGMAS:
+            conn.exec_driver_sql(pragma)
+
+        # Table overview straight from SQLite: declared column types from the
+        # schema, and row/null counts for every column in one aggregate scan
+        logger.info("📋 Summarizing table schema and missing values...")
+        schema = pd.read_sql("PRAGMA table_info(trips)", conn)
+        column_types = pd.Series(schema['type'].to_numpy(), index=schema['name'].to_numpy())
+        # SUM over no rows is NULL, so empty tables report zero nulls
+        null_sql = ', '.join(
+            f'COALESCE(SUM("{col}" IS NULL), 0) AS "{col}"' for col in column_types.index
+        )
+        counts = pd.read_sql(f"SELECT COUNT(*) AS row_count, {null_sql} FROM trips", conn).iloc[0]
+        row_count = int(counts['row_count'])
+        null_counts = counts.drop('row_count').astype('int64')
+
+        # Load only the numeric trip columns; the ISO 8601 timestamp text is
+        # never pulled into pandas, the temporal plots are aggregated in SQL.
+        # Rows are fetched from the sqlite3 cursor in chunks straight into
+        # one preallocated float64 array (NULL becomes NaN), so no pandas
+        # frame is built per chunk.
+        values = np.empty((row_count, len(REPORT_COLUMNS)), dtype=np.float64)
+        cursor = conn.connection.cursor()
+        cursor.execute(f"SELECT {', '.join(REPORT_COLUMNS)} FROM trips")
+        loaded = 0
+        while rows := cursor.fetchmany(REPORT_CHUNK_SIZE):
+            values[loaded:loaded + len(rows)] = np.array(rows, dtype=np.float64)
+            loaded += len(rows)
+        cursor.close()
+        df = pd.DataFrame(values[:loaded], columns=REPORT_COLUMNS)
+        logger.info("📊 Loaded %s records for analysis", f"{len(df):,}")
 
-    # Prepare datetime features for temporal analysis
-    print("⏰ Preparing temporal features...")
-    df['pickup_datetime'] = pd.to_datetime(df['tpep_pickup_datetime'])
-    df['hour'] = df['pickup_datetime'].dt.hour
-    df['weekday'] = df['pickup_datetime'].dt.day_name()
+        # Aggregate temporal features in SQLite with one GROUP BY over
+        # (weekday, hour), so each timestamp is parsed once and only counts load
+        logger.info("⏰ Aggregating temporal features...")
+        # strftime('%w') counts from Sunday; shift so 0=Monday, 6=Sunday.
+        # Missing or unparseable pickup times (strftime returns NULL) are
+        # left out rather than folded into a bogus bucket.
+        temporal = pd.read_sql(
+            "SELECT (CAST(strftime('%w', tpep_pickup_datetime) AS INTEGER) + 6) % 7 AS weekday, "
+            "CAST(strftime('%H', tpep_pickup_datetime) AS INTEGER) AS hour, "
+            "COUNT(*) AS trips FROM trips "
+            "WHERE strftime('%H', tpep_pickup_datetime) IS NOT NULL "
+            "GROUP BY weekday, hour",
+            conn
+        )
+        # Fold the (weekday, hour) cells into per-hour and per-weekday totals
+        hours = temporal['hour'].to_numpy(dtype=np.int64)
+        weekdays = temporal['weekday'].to_numpy(dtype=np.int64)
+        hourly_counts = np.bincount(hours, weights=temporal['trips'], minlength=24)
+        weekday_counts = np.bincount(weekdays, weights=temporal['trips'], minlength=7)
 
     # Ensure output directories exist
-    os.makedirs("plots", exist_ok=True)
-    os.makedirs("reports", exist_ok=True)
+    if plot_dir:
+        os.makedirs(plot_dir, exist_ok=True)
+    os.makedirs(os.path.dirname(output_html) or ".", exist_ok=True)
 
-    # Generate visualization plots
-    print("📈 Generating visualization plots...")
-    
-    # Plot 1: Trip Distance Distribution
-    print("  📏 Trip distance distribution...")
-    plt.figure(figsize=(10, 6))
-    sns.histplot(df['trip_distance'], bins=50, kde=True)
-    plt.title("Trip Distance Distribution")
-    plt.xlabel("Distance (Miles)")
-    plt.ylabel("Frequency")
-    plt.tight_layout()
-    plt.savefig("plots/trip_distance.png", dpi=300, bbox_inches='tight')
-    plt.clf()
-
-    # Plot 2: Trip Duration Distribution
-    print("  ⏱️ Trip duration distribution...")
-    plt.figure(figsize=(10, 6))
-    sns.histplot(df['duration_minutes'], bins=50, kde=True)
-    plt.title("Trip Duration Distribution")
-    plt.xlabel("Duration (Minutes)")
-    plt.ylabel("Frequency")
-    plt.tight_layout()
-    plt.savefig("plots/duration_distribution.png", dpi=300, bbox_inches='tight')
-    plt.clf()
-
-    # Plot 3: Fare vs Distance Relationship
-    print("  💰 Fare vs distance analysis...")
-    plt.figure(figsize=(10, 6))
-    # Sample data for performance if dataset is large
-    plot_sample = df.sample(n=min(5000, len(df)), random_state=42)
-    sns.scatterplot(x='trip_distance', y='fare_amount', data=plot_sample, alpha=0.5)
-    plt.title("Fare vs Distance")
-    plt.xlabel("Distance (Miles)")
-    plt.ylabel("Fare Amount (USD)")
-    plt.tight_layout()
-    plt.savefig("plots/fare_vs_distance.png", dpi=300, bbox_inches='tight')
-    plt.clf()
-
-    # Plot 4: Hourly Trip Distribution
-    print("  🕐 Hourly trip patterns...")
-    plt.figure(figsize=(12, 6))
-    sns.countplot(x='hour', data=df, palette='viridis')
-    plt.title("Trips by Hour")
-    plt.xlabel("Hour of Day")
-    plt.ylabel("Number of Trips")
-    plt.tight_layout()
-    plt.savefig("plots/hourly_distribution.png", dpi=300, bbox_inches='tight')
-    plt.clf()
-
-    # Plot 5: Weekly Trip Distribution
-    print("  📅 Weekly trip patterns...")
-    plt.figure(figsize=(12, 6))
-    weekday_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    sns.countplot(x='weekday', data=df, order=weekday_order, palette='Set2')
-    plt.title("Trips by Weekday")
-    plt.xlabel("Day of Week")
-    plt.ylabel("Number of Trips")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig("plots/weekday_distribution.png", dpi=300, bbox_inches='tight')
-    plt.clf()
-
-    # Load Jinja2 template
-    print("📝 Loading HTML template...")
-    env = Environment(loader=FileSystemLoader("templates"))
-    template = env.get_template("report_template.html")
-
-    # Prepare plot data for embedding
-    print("🖼️ Embedding images as base64 for PDF compatibility...")
-    plots = [
-        "plots/trip_distance.png",
-        "plots/duration_distribution.png",
-        "plots/fare_vs_distance.png",
-        "plots/hourly_distribution.png",
-        "plots/weekday_distribution.png"
+    # Each of the five independent plots is rendered from only the arrays it
+    # needs and returns the finished base64 data URL
+    logger.info("📈 Generating visualization plots...")
+    plot_jobs = [
+        (_render_trip_distance, df['trip_distance'].to_numpy()),
+        (_render_duration, df['duration_minutes'].to_numpy()),
+        (_render_fare_vs_distance, df['trip_distance'].to_numpy(), df['fare_amount'].to_numpy()),
+        (_render_hourly, hourly_counts),
+        (_render_weekday, weekday_counts),
     ]
-    
-    # Convert images to base64 data URLs for embedded HTML
-    embedded_plots = []
-    for plot in plots:
-        abs_path = os.path.abspath(plot)
-        if os.path.exists(abs_path):
-            try:
-                with open(abs_path, "rb") as img_file:
-                    img_data = base64.b64encode(img_file.read()).decode('utf-8')
-                    # Create data URL for embedding in HTML (PDF-safe)
-                    data_url = f"data:image/png;base64,{img_data}"
-                    embedded_plots.append({
-                        'name': plot.split("/")[-1].replace("_", " ").replace(".png", "").title(),
-                        'data': data_url
-                    })
-                    print(f"  ✅ Embedded {plot}")
-            except Exception as e:
-                print(f"  ❌ Failed to embed {plot}: {e}")
-        else:
-            print(f"  ⚠️ Plot file not found: {abs_path}")
-
-    # Render HTML template with data
-    print("🎨 Rendering HTML report...")
-    html_output = template.render(
-        shape=f"{df.shape[0]:,} rows × {df.shape[1]} columns",
-        dtypes=df.dtypes.to_string(),
-        nulls=df.isnull().sum().to_string(),
-        describe=df.describe().to_html(classes="table table-striped", table_id="stats-table"),
-        plots=embedded_plots
-    )
+    workers = min(len(plot_jobs), os.cpu_count() or 1)
+    if workers > 1 and loaded >= PARALLEL_PLOT_MIN_ROWS:
+        # Large tables: one figure per worker process (matplotlib is not
+        # thread-safe). Spawned workers start clean instead of forking a
+        # process that may be running other threads (e.g. under Prefect),
+        # but each one re-imports the caller's __main__ module, which only
+        # pays off when the plots themselves are expensive.
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn')
+        ) as executor:
+            futures = [
+                executor.submit(render, *arrays, plot_dir=plot_dir, dpi=dpi)
+                for render, *arrays in plot_jobs
+            ]
+            embedded_plots = [future.result() for future in futures]
+    else:
+        # Small tables or a single CPU: drawing inline is faster than
+        # starting worker processes
+        embedded_plots = [
+            render(*arrays, plot_dir=plot_dir, dpi=dpi) for render, *arrays in plot_jobs
+        ]
+    if logger.isEnabledFor(logging.DEBUG):
+        for plot in embedded_plots:
+            logger.debug("  ✅ Embedded %s", plot['name'])
+
+    # Load Jinja2 template from the shared environment
+    logger.info("📝 Loading HTML template...")
+    os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+    template = _JINJA_ENV.get_template("report_template.html")
 
-    # Save HTML report
-    print(f"💾 Saving HTML report to {output_html}...")
+    # Render the HTML template straight into the output file; streaming
+    # avoids building the whole report (with its base64 images) as one string
+    logger.info("🎨 Rendering HTML report...")
+    logger.info("💾 Saving HTML report to %s...", output_html)
     with open(output_html, "w", encoding="utf-8") as f:
-        f.write(html_output)
+        template.stream(
+            shape=f"{row_count:,} rows × {len(column_types)} columns",
+            dtypes=column_types.to_string(),
+            nulls=null_counts.to_string(),
+            # Descriptive statistics only over the numeric columns in memory
+            describe=_stats_table_html(df.describe()),
+            plots=embedded_plots
+        ).dump(f)
+        report_size = f.tell()
     
-    print(f"✅ EDA report successfully generated: {output_html}")
-    print(f"📊 Report includes {len(embedded_plots)} embedded visualizations")
-    print(f"📁 Report size: {os.path.getsize(output_html):,} bytes")
+    logger.info("✅ EDA report successfully generated: %s", output_html)
+    logger.info("📊 Report includes %d embedded visualizations", len(embedded_plots))
+    logger.info("📁 Report size: %s bytes", f"{report_size:,}")
@@ -0,0 +1,87 @@
+"""
+NYC Taxi Streaming Sampler
+
+This module draws a fixed-size uniform random sample from a stream of Arrow
+record batches without materializing the full dataset. It implements
+reservoir sampling (Algorithm L), which computes how many rows to skip
+between replacements instead of drawing a random number for every row.
+
+Key Features:
+- Peak memory bounded by the sample size, not the input size
+- Reproducible samples through a fixed random seed
+- Column types and nulls preserved by keeping the reservoir in Arrow
+
+Author: NYC Taxi Project
+Date: 2025
+"""
+
+import math
+from typing import Tuple
+
+import numpy as np
+import pyarrow as pa
+
+
+def _skip(rng: np.random.Generator, w: float) -> int:
+    """Number of rows to pass over before the next reservoir replacement."""
+    return math.floor(math.log(1.0 - rng.random()) / math.log(1.0 - w))
+
+
+def reservoir_sample(
+    reader: pa.RecordBatchReader, sample_size: int, seed: int = 42
+) -> Tuple[pa.Table, int]:
+    """
+    Uniformly sample rows from a record batch stream with Algorithm L.
+
+    Rows chosen within a batch are appended to the reservoir with a single
+    take() and the reservoir is compacted back to sample_size rows, so the
+    per-row work stays in Arrow's C++ kernels.
+
+    Args:
+        reader (pa.RecordBatchReader): Stream of batches to sample from
+        sample_size (int): Maximum number of rows to keep
+        seed (int): Seed for the random generator. Defaults to 42.
+
+    Returns:
+        Tuple[pa.Table, int]: The sampled rows (all rows if the stream has
+                              fewer than sample_size) and the total number
+                              of rows read from the stream
+    """
+    rng = np.random.default_rng(seed)
+    reservoir = pa.Table.from_batches([], schema=reader.schema)
+    seen = 0
+
+    w = math.exp(math.log(1.0 - rng.random()) / sample_size)
+    next_pos = sample_size + _skip(rng, w)  # global index of next replacement
+
+    for batch in reader:
+        n = batch.num_rows
+        if n == 0:
+            continue
+        candidates = pa.Table.from_batches([batch])
+
+        # Fill phase: the first sample_size rows go straight into the reservoir
+        if seen < sample_size:
+            fill = min(sample_size - seen, n)
+            reservoir = pa.concat_tables([reservoir, candidates.slice(0, fill)])
+
+        # Replacement phase: map every slot to its row in reservoir + picks,
+        # later picks for the same slot overwriting earlier ones
+        end = seen + n
+        picks = []
+        slot_rows = None
+        while next_pos < end:
+            if slot_rows is None:
+                slot_rows = np.arange(sample_size)
+            slot_rows[rng.integers(sample_size)] = sample_size + len(picks)
+            picks.append(next_pos - seen)
+            w *= math.exp(math.log(1.0 - rng.random()) / sample_size)
+            next_pos += _skip(rng, w) + 1
+
+        if picks:
+            reservoir = pa.concat_tables(
+                [reservoir, candidates.take(pa.array(picks, type=pa.int64()))]
+            ).take(pa.array(slot_rows))
+        seen = end
+
+    return reservoir.combine_chunks(), seen